@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Shared core for the Ollama Distributed API mock servers
+
+bin/api-mock-server.py and bin/api-mock-server-8090.py are thin shims over
+this module: same handler, same pre-serialized payloads, each bound to its
+own port and (optionally restricted) routes table via APIHandler.configure.
+"""
+
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from datetime import datetime
+import time
+
+# orjson serializes straight to UTF-8 bytes ~5x faster than stdlib json;
+# fall back to stdlib so the mock server runs anywhere
+try:
+    import orjson
+    dumps = orjson.dumps
+    loads = orjson.loads
+except ImportError:
+    import json
+    orjson = None
+    dumps = lambda o: json.dumps(o).encode()
+    loads = json.loads
+
+# Static payloads pre-serialized once at import time so the hot path is a
+# single buffer write instead of dict construction + JSON encoding per request.
+# Timestamped payloads keep a "__TS__" sentinel patched in per request.
+_TS_SENTINEL = b"__TS__"
+
+_HEALTH_TEMPLATE = dumps({
+    "status": "healthy",
+    "timestamp": "__TS__",
+    "version": "1.0.0",
+    "node_id": "12D3KooW...",
+    "services": {
+        "p2p": True,
+        "p2p_peers": 0,
+        "consensus": True,
+        "consensus_leader": False,
+        "scheduler": True,
+        "available_nodes": 1
+    }
+})
+
+_STATUS_BYTES = dumps({
+    "distributed_mode": True,
+    "fallback_mode": True,
+    "cluster_size": 1,
+    "active_nodes": ["node1"],
+    "scheduler_stats": {},
+    "runner_stats": {},
+    "integration_stats": {}
+})
+
+_NODES_BYTES = dumps({
+    "nodes": [
+        {
+            "id": "node1",
+            "status": "active",
+            "address": "127.0.0.1:8080",
+            "models": [],
+            "resources": {
+                "cpu": 0.15,
+                "memory": 0.25,
+                "disk": 0.20
+            }
+        }
+    ]
+})
+
+_METRICS_TEMPLATE = dumps({
+    "timestamp": "__TS__",
+    "node_id": "12D3KooW...",
+    "connected_peers": 0,
+    "is_leader": False,
+    "requests_processed": 0,
+    "models_loaded": 0,
+    "nodes_total": 1,
+    "nodes_online": 1,
+    "uptime": 300,
+    "websocket_connections": 0
+})
+
+_TAGS_BYTES = dumps({
+    "models": [
+        {
+            "name": "llama2:7b",
+            "status": "available",
+            "size": "3.8GB"
+        },
+        {
+            "name": "phi3:mini",
+            "status": "ready",
+            "size": "2.3GB"
+        }
+    ]
+})
+
+_MODELS_V1_BYTES = dumps({
+    "data": [
+        {
+            "id": "llama2:7b",
+            "object": "model",
+            "created": 1677652288,
+            "owned_by": "ollama"
+        },
+        {
+            "id": "phi3:mini",
+            "object": "model",
+            "created": 1677652288,
+            "owned_by": "ollama"
+        }
+    ]
+})
+
+# Mock embedding vectors never change, so the full response bodies are
+# serialized once here instead of iterating 500/1500 Python floats per request.
+# With NumPy + orjson the vectors live in contiguous float32 buffers that
+# orjson walks natively (OPT_SERIALIZE_NUMPY) -- no boxed Python floats at all.
+try:
+    import numpy as _np
+except ImportError:
+    _np = None
+
+if _np is not None and orjson is not None:
+    _EMBED_500 = _np.tile(_np.array([0.1, 0.2, 0.3, 0.4, 0.5], dtype=_np.float32), 100)
+    _EMBED_1500 = _np.tile(_np.array([0.1, 0.2, 0.3, 0.4, 0.5], dtype=_np.float32), 300)
+    _embed_dumps = lambda o: orjson.dumps(o, option=orjson.OPT_SERIALIZE_NUMPY)
+else:
+    _EMBED_500 = [0.1, 0.2, 0.3, 0.4, 0.5] * 100
+    _EMBED_1500 = [0.1, 0.2, 0.3, 0.4, 0.5] * 300
+    _embed_dumps = dumps
+
+_EMBED_RESP = _embed_dumps({"embedding": _EMBED_500})
+
+_V1_EMBED_RESP = _embed_dumps({
+    "object": "list",
+    "data": [{
+        "object": "embedding",
+        "embedding": _EMBED_1500,
+        "index": 0
+    }],
+    "model": "text-embedding-ada-002",
+    "usage": {
+        "prompt_tokens": 8,
+        "total_tokens": 8
+    }
+})
+
+# Timestamp bytes cached for 100ms: probe clients can't tell sub-100ms
+# differences apart on a mock, and this keeps datetime allocation and
+# string formatting off the per-request path
+_TS_CACHE = [0.0, b""]
+
+def _timestamp_bytes():
+    now = time.monotonic()
+    if now - _TS_CACHE[0] >= 0.1:
+        # Bytes before time: a concurrent handler thread landing between the
+        # two assignments must see a valid (possibly stale) timestamp, never
+        # the initial b""
+        _TS_CACHE[1] = (datetime.utcnow().isoformat() + "Z").encode()
+        _TS_CACHE[0] = now
+    return _TS_CACHE[1]
+
+def _handle_health():
+    return _HEALTH_TEMPLATE.replace(_TS_SENTINEL, _timestamp_bytes())
+
+def _handle_metrics():
+    return _METRICS_TEMPLATE.replace(_TS_SENTINEL, _timestamp_bytes())
+
+def _handle_generate(data):
+    return dumps({
+        "model": data.get("model", "test"),
+        "response": "This is a placeholder response. Distributed inference not yet implemented.",
+        "done": True
+    })
+
+def _handle_chat(data):
+    return dumps({
+        "model": data.get("model", "test"),
+        "message": {
+            "role": "assistant",
+            "content": "This is a placeholder response. Distributed chat inference not yet implemented."
+        },
+        "done": True
+    })
+
+def _handle_show(data):
+    model_name = data.get("name", "test")
+    return dumps({
+        "name": model_name,
+        "size": "2.3GB",
+        "modified_at": datetime.utcnow().isoformat() + "Z",
+        "details": {
+            "format": "gguf",
+            "families": ["phi3"] if "phi3" in model_name else ["llama2"]
+        }
+    })
+
+def _handle_chat_completions(data):
+    return dumps({
+        "id": "chatcmpl-123",
+        "object": "chat.completion",
+        "created": 1677652288,
+        "model": data.get("model", "llama2:7b"),
+        "choices": [{
+            "index": 0,
+            "message": {
+                "role": "assistant",
+                "content": "This is a placeholder OpenAI-compatible response."
+            },
+            "finish_reason": "stop"
+        }],
+        "usage": {
+            "prompt_tokens": 10,
+            "completion_tokens": 20,
+            "total_tokens": 30
+        }
+    })
+
+def _parse_body(post_data):
+    """Parse a JSON request body; empty or non-JSON bodies become {}
+
+    The first-byte check short-circuits the common empty/non-JSON probe
+    without paying for a parser invocation or a raised exception.
+    """
+    if not post_data or post_data[:1] not in (b'{', b'['):
+        return {}
+    try:
+        return loads(post_data)
+    except ValueError:  # orjson.JSONDecodeError and stdlib's both derive from it
+        return {}
+
+def _frame(body):
+    """Build a complete HTTP response (status line + headers + body) as one
+    bytes object so it goes out in a single write"""
+    return ("HTTP/1.1 200 OK\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: keep-alive\r\n\r\n").encode() + body
+
+_NOT_FOUND_FRAME = b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\n\r\n"
+
+# Route tables: O(1) dict lookup replaces the if/elif chains. bytes values
+# are complete pre-built response frames served as-is; callables build the
+# body per request and get framed on the fly.
+_GET_ROUTES = {
+    '/health': _handle_health,
+    '/api/distributed/status': _frame(_STATUS_BYTES),
+    '/api/distributed/nodes': _frame(_NODES_BYTES),
+    '/api/distributed/metrics': _handle_metrics,
+    '/api/tags': _frame(_TAGS_BYTES),
+    '/v1/models': _frame(_MODELS_V1_BYTES),
+}
+
+# POST routes whose handlers consume the parsed request body
+_POST_ROUTES = {
+    '/api/generate': _handle_generate,
+    '/api/chat': _handle_chat,
+    '/api/show': _handle_show,
+    '/v1/chat/completions': _handle_chat_completions,
+}
+
+# POST routes answered from cache without reading the body
+_POST_STATIC = {
+    '/api/embed': _frame(_EMBED_RESP),
+    '/v1/embeddings': _frame(_V1_EMBED_RESP),
+}
+
+class APIHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 + Content-Length on every response enables keep-alive, so test
+    # clients reuse one connection instead of reconnecting per request
+    protocol_version = 'HTTP/1.1'
+
+    # Default to the full endpoint surface; shims narrow this via configure()
+    get_routes = _GET_ROUTES
+    post_routes = _POST_ROUTES
+    post_static = _POST_STATIC
+
+    @classmethod
+    def configure(cls, get_routes=None, post_routes=None, post_static=None):
+        """Return a handler subclass bound to a restricted set of routes"""
+        overrides = {
+            name: table for name, table in (
+                ('get_routes', get_routes),
+                ('post_routes', post_routes),
+                ('post_static', post_static),
+            ) if table is not None
+        }
+        return type(cls.__name__, (cls,), overrides)
+
+    def _send_json(self, body):
+        self.wfile.write(_frame(body))
+
+    def _send_404(self):
+        self.wfile.write(_NOT_FOUND_FRAME)
+
+    def do_GET(self):
+        route = self.get_routes.get(self.path)
+        if route is None:
+            self._send_404()
+            return
+        # Static routes are fully pre-framed: one dict lookup, one write
+        self.wfile.write(_frame(route()) if callable(route) else route)
+
+    def _drain_body(self):
+        # Discard the request body in fixed-size chunks without building one
+        # big bytes object; required to keep the connection reusable
+        remaining = int(self.headers.get('Content-Length', 0))
+        while remaining > 0:
+            chunk = self.rfile.read(min(remaining, 65536))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+
+    def do_POST(self):
+        frame = self.post_static.get(self.path)
+        if frame is not None:
+            self.wfile.write(frame)
+            self._drain_body()
+            return
+
+        handler = self.post_routes.get(self.path)
+        if handler is None:
+            self._drain_body()
+            self._send_404()
+            return
+
+        content_length = int(self.headers.get('Content-Length', 0))
+        post_data = self.rfile.read(content_length)
+        self._send_json(handler(_parse_body(post_data)))
+
+    def log_message(self, format, *args):
+        # Suppress log messages for cleaner output
+        pass
+
+def start_server(port=8080, handler=APIHandler):
+    # ThreadingHTTPServer serves requests concurrently instead of one at a time;
+    # daemon threads keep shutdown from hanging on open connections
+    server = ThreadingHTTPServer(('0.0.0.0', port), handler)
+    server.daemon_threads = True
+    print(f"🚀 Starting Ollama Distributed API Mock Server on port {port}")
+    print(f"   API endpoint: http://localhost:{port}")
+    print(f"   Health check: http://localhost:{port}/health")
+    server.serve_forever()
+
@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+"""
+Ollama Distributed API Test Client
+Probes the distributed API endpoints and records status and latency
+for training module validation
+
+Runs unmodified under PyPy (`pypy3 api-test-client.py`): every dependency
+here has a pure-Python path (orjson/simdjson/aiohttp are optional with
+stdlib fallbacks), and PyPy's tracing JIT typically gives 2-5x on the
+request-dispatch loop once test_endpoint is warm -- worthwhile for long
+soak runs against a fast local server.
+"""
+
+import argparse
+import asyncio
+import concurrent.futures
+import functools
+import mmap
+import os
+import socket
+import ssl
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# pysimdjson is optional: its SIMD structural pass parses large bodies
+# (/api/v1/models, /api/v1/stats) at multi-GB/s where stdlib manages ~200 MB/s
+try:
+    import simdjson
+except ImportError:
+    simdjson = None
+
+# simdjson parsers are single-threaded and invalidate prior document proxies
+# on reuse, so each thread-pool worker gets its own via threading.local; the
+# per-parse cost still amortizes across that worker's probes
+_simdjson_tls = threading.local()
+
+def _simdjson_loads(body):
+    parser = getattr(_simdjson_tls, 'parser', None)
+    if parser is None:
+        parser = _simdjson_tls.parser = simdjson.Parser()
+    doc = parser.parse(body)
+    # Object/array roots are lazy proxies tied to the parser's tape:
+    # materialize them before the next parse reuses it. Scalar roots come
+    # back as plain Python values.
+    if hasattr(doc, 'as_dict'):
+        return doc.as_dict()
+    if hasattr(doc, 'as_list'):
+        return doc.as_list()
+    return doc
+
+# Fastest available JSON codec bound once at import -- orjson, then simdjson
+# (stdlib for encoding), then stdlib -- so the hot paths call _loads/_dumps
+# with zero per-call dispatch
+try:
+    import orjson
+    _loads = orjson.loads
+    _dumps = orjson.dumps  # serializes ProbeResult dataclasses natively
+except ImportError:
+    orjson = None
+    import json as _stdlib_json
+    from dataclasses import asdict as _asdict
+
+    if simdjson is not None:
+        _loads = _simdjson_loads
+    else:
+        _loads = _stdlib_json.loads
+    _dumps = lambda o: _stdlib_json.dumps(
+        _asdict(o) if hasattr(o, '__dataclass_fields__') else o
+    ).encode()
+
+# zstd is only advertised when urllib3 can actually decode it (it needs the
+# optional zstandard package); otherwise a zstd-capable server would hand
+# back raw compressed bytes under a JSON Content-Type
+try:
+    import zstandard as _zstandard
+    _ACCEPT_ENCODING = 'gzip, deflate, zstd'
+except ImportError:
+    _zstandard = None
+    _ACCEPT_ENCODING = 'gzip, deflate'
+
+# aiohttp is optional: the async suite drives every socket from one event
+# loop, so fan-out stays O(1) threads no matter how many endpoints are probed
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+# httpx is optional: it adds HTTP/2 so all probes multiplex over a single
+# TCP+TLS connection instead of one HTTP/1.1 connection per parallel worker
+try:
+    import httpx
+    _REQUEST_ERRORS = (requests.exceptions.RequestException, httpx.HTTPError)
+except ImportError:
+    httpx = None
+    _REQUEST_ERRORS = (requests.exceptions.RequestException,)
+
+# (path, method) pairs built once at import: an immutable shared tuple both
+# suites default to, instead of rebuilding a list per run. Pure liveness
+# endpoints use HEAD -- status and timing are all we keep, so skipping the
+# body saves transfer and decode CPU.
+_DEFAULT_ENDPOINTS = (
+    ("/health", "HEAD"),
+    ("/api/v1/health", "HEAD"),
+    ("/api/v1/nodes", "GET"),
+    ("/api/v1/models", "GET"),
+    ("/api/v1/stats", "GET"),
+)
+
+@dataclass(slots=True)
+class ProbeResult:
+    """One endpoint probe: a compact slotted struct instead of a dict-per-call
+
+    Slots cut per-result memory roughly in half and make field access a
+    fixed index instead of a hash lookup; orjson serializes dataclasses
+    natively, so the results file comes out identical.
+    """
+
+    timestamp_ns: int
+    endpoint: str
+    method: str
+    status_code: int | None = None
+    success: bool = False
+    response_time: float | None = None
+    response_json: Any = None
+    response_text: str | None = None
+    error: str | None = None
+    timestamp: str | None = None  # ISO string, filled in once at dump time
+
+# One SSLContext shared by every pooled connection: urllib3 otherwise builds
+# a context per adapter, which throws away TLS session tickets. With a shared
+# context the first HTTPS probe pays the full handshake and concurrent
+# siblings resume, saving ~1 RTT each. ALPN stays http/1.1-only: requests/
+# urllib3 can't speak h2, so advertising it would let an h2-capable server
+# select a protocol this path can't use (HTTP/2 is httpx's job via http2=True).
+_SSL_CONTEXT = ssl.create_default_context()
+_SSL_CONTEXT.set_alpn_protocols(['http/1.1'])
+
+class _TunedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter with latency-oriented socket options on every pooled socket
+
+    TCP_NODELAY disables Nagle so small request frames (HEAD probes, tiny
+    POST bodies) go out immediately instead of waiting up to 40ms for an ACK;
+    SO_KEEPALIVE keeps idle pooled connections from being silently dropped
+    by middleboxes between suite runs. All pooled connections share
+    _SSL_CONTEXT for TLS session resumption.
+    """
+
+    _SOCKET_OPTIONS = [
+        (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),
+        (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+    ]
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs['socket_options'] = self._SOCKET_OPTIONS
+        kwargs['ssl_context'] = _SSL_CONTEXT
+        super().init_poolmanager(*args, **kwargs)
+
+class OllamaAPIClient:
+    def __init__(self, base_url="http://localhost:8080", timeout=10, http2=False):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+        if http2:
+            if httpx is None:
+                raise RuntimeError("http2=True requires httpx[http2] to be installed")
+            self.session = httpx.Client(
+                http2=True,
+                timeout=timeout,
+                limits=httpx.Limits(max_keepalive_connections=16, max_connections=32),
+            )
+        else:
+            self.session = requests.Session()
+
+            # Tuned connection pool: enough sockets for the parallel suite plus
+            # headroom, and a short retry/backoff for transient gateway errors so
+            # a blip doesn't cost a reconnect and a failed probe
+            adapter = _TunedHTTPAdapter(
+                pool_connections=16,
+                pool_maxsize=32,
+                pool_block=False,
+                max_retries=Retry(total=2, backoff_factor=0.1, status_forcelist=[502, 503, 504]),
+            )
+            self.session.mount('http://', adapter)
+            self.session.mount('https://', adapter)
+            # Explicit Accept-Encoding: larger bodies (/api/v1/models,
+            # /api/v1/stats) compress 10-50x; zstd is included only when the
+            # decoder is installed
+            self.session.headers.update({
+                'Connection': 'keep-alive',
+                'Accept-Encoding': _ACCEPT_ENCODING,
+            })
+
+        # Per-call overhead trimmed for tight benchmark loops: verbs resolve
+        # through a dict of bound methods instead of an if/elif chain plus
+        # attribute lookup, and built URLs are cached per endpoint
+        self._verb = {"GET": self.session.get, "POST": self.session.post, "HEAD": self.session.head}
+        self._urls = {}
+
+        # Endpoints where a HEAD probe came back 405/501; reprobed as GET
+        self._head_unsupported = set()
+
+    def test_endpoint(self, endpoint, method="GET", data=None):
+        """Probe a single endpoint and record status and timing"""
+        if method == "HEAD" and endpoint in self._head_unsupported:
+            method = "GET"
+
+        url = self._urls.get(endpoint)
+        if url is None:
+            url = self._urls[endpoint] = self.base_url + endpoint
+
+        # A raw time_ns integer per probe; the ISO string is formatted once
+        # per result at dump time instead of allocating a datetime per call
+        result = ProbeResult(time.time_ns(), endpoint, method)
+
+        try:
+            fn = self._verb.get(method.upper())
+            if fn is None:
+                fn = functools.partial(self.session.request, method)
+
+            # perf_counter_ns is monotonic and allocation-free, unlike
+            # response.elapsed which builds datetime objects off the
+            # wall clock and adds jitter to sub-ms probes
+            start_ns = time.perf_counter_ns()
+            if data is None:
+                response = fn(url, timeout=self.timeout)
+            else:
+                response = fn(url, json=data, timeout=self.timeout)
+            elapsed = (time.perf_counter_ns() - start_ns) * 1e-9
+
+            if method == "HEAD" and response.status_code in (405, 501):
+                # Server doesn't implement HEAD for this path; remember that
+                # and fall back to a full GET probe
+                self._head_unsupported.add(endpoint)
+                return self.test_endpoint(endpoint, "GET", data)
+
+            result.status_code = response.status_code
+            result.success = response.status_code < 400
+            result.response_time = elapsed
+
+            # Liveness probes only need status + timing; skip body handling
+            if method == "HEAD":
+                return result
+
+            # Read the body once as bytes; both the JSON decode and the
+            # truncated-text fallback work off the same buffer instead of
+            # materializing a second full str via response.text
+            body = response.content
+            # Branch on Content-Type instead of decode-and-catch: no exception
+            # object or traceback is built for the plain-text/HTML case
+            if 'json' in response.headers.get('Content-Type', ''):
+                # orjson on the raw bytes skips requests' charset sniffing and
+                # the stdlib decoder; simdjson takes over on large bodies where
+                # its SIMD pass wins (its startup overhead loses below ~1 KiB).
+                # The except only fires on a JSON Content-Type with a malformed
+                # body (truncated response, proxy error page) -- not as routine
+                # content detection, which the header branch already did.
+                try:
+                    if simdjson is not None and len(body) >= 1024:
+                        result.response_json = _simdjson_loads(body)
+                    else:
+                        result.response_json = _loads(body)
+                except ValueError:
+                    result.response_text = body[:200].decode('utf-8', errors='replace')
+            else:
+                result.response_text = body[:200].decode('utf-8', errors='replace')
+        except _REQUEST_ERRORS as e:
+            result.error = str(e)
+
+        return result
+
+    def run_test_suite(self, endpoints=_DEFAULT_ENDPOINTS, sink=None):
+        """Probe all endpoints in parallel and return results in endpoint order
+
+        `sink`, if given, is called with each result as it completes -- before
+        the suite finishes -- so long soak runs can stream results out with
+        O(1) memory instead of buffering everything for one final dump.
+        """
+        if not endpoints:
+            return []
+
+        # Untimed warm-up probe: primes the pool's TCP (and TLS) handshake and
+        # opens the congestion window, so the first timed probe isn't
+        # systematically inflated relative to its keep-alive siblings
+        try:
+            self.session.head(self.base_url + endpoints[0][0], timeout=5)
+        except Exception:
+            pass
+
+        # The probes are independent and network-bound, so fan them out on a
+        # thread pool: wall time drops from sum(RTT) to max(RTT). The shared
+        # Session is thread-safe for these calls and keeps connections alive.
+        # Workers cap at the adapter's pool_maxsize: beyond that, extra
+        # threads just fight over pooled connections, and a large --config
+        # endpoint list would otherwise spawn thousands of OS threads.
+        results = [None] * len(endpoints)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(len(endpoints), 32)) as executor:
+            futures = {
+                executor.submit(self.test_endpoint, endpoint, method): i
+                for i, (endpoint, method) in enumerate(endpoints)
+            }
+            for future in concurrent.futures.as_completed(futures):
+                result = future.result()
+                results[futures[future]] = result
+                if sink is not None:
+                    sink(result)
+
+        return results
+
+    async def _probe(self, session, endpoint, method="GET", data=None):
+        """Async mirror of test_endpoint driven by a shared aiohttp session"""
+        if method == "HEAD" and endpoint in self._head_unsupported:
+            method = "GET"
+
+        url = f"{self.base_url}{endpoint}"
+        result = ProbeResult(time.time_ns(), endpoint, method)
+
+        start = time.perf_counter()
+        try:
+            async with session.request(method, url, json=data) as response:
+                if method == "HEAD":
+                    if response.status in (405, 501):
+                        # Same fallback as the sync path: remember that the
+                        # server lacks HEAD here and reprobe with GET
+                        self._head_unsupported.add(endpoint)
+                        return await self._probe(session, endpoint, "GET", data)
+                    result.response_time = time.perf_counter() - start
+                    result.status_code = response.status
+                    result.success = response.status < 400
+                    return result
+
+                body = await response.read()
+                result.response_time = time.perf_counter() - start
+                result.status_code = response.status
+                result.success = response.status < 400
+                if 'json' in response.headers.get('Content-Type', ''):
+                    try:
+                        if simdjson is not None and len(body) >= 1024:
+                            result.response_json = _simdjson_loads(body)
+                        else:
+                            result.response_json = _loads(body)
+                    except ValueError:
+                        result.response_text = body[:200].decode('utf-8', errors='replace')
+                else:
+                    result.response_text = body[:200].decode('utf-8', errors='replace')
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            # ClientTimeout expiry raises asyncio.TimeoutError, not a
+            # ClientError; record it like the sync path instead of letting one
+            # hung endpoint crash the whole gather
+            result.error = str(e) or "timed out"
+
+        return result
+
+    async def run_test_suite_async(self, endpoints=_DEFAULT_ENDPOINTS):
+        """Probe endpoints concurrently on a single event loop
+
+        Preferable to the thread-pool suite for high fan-out (dozens of
+        endpoints across a cluster): no per-request OS thread, explicit
+        keep-alive, and results arrive in endpoint order from gather.
+        """
+        if aiohttp is None:
+            raise RuntimeError("run_test_suite_async requires aiohttp to be installed")
+
+        connector = aiohttp.TCPConnector(limit=64, keepalive_timeout=85)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            return list(await asyncio.gather(
+                *[self._probe(session, ep, method) for ep, method in endpoints]
+            ))
+
+def _load_endpoints(path):
+    """Load (path, method) pairs from a JSON config file
+
+    Expected shape: {"endpoints": [["/health", "HEAD"], "/api/v1/stats"]};
+    bare strings default to GET. The file is mmapped so orjson parses
+    straight out of the mapped pages without a read() copy -- with large
+    thousands-of-endpoints configs there's no double buffering.
+    """
+    with open(path, 'rb') as f:
+        # Empty files can't be mmapped; treat them like an empty endpoint
+        # list and fall back to the built-in suite
+        if os.fstat(f.fileno()).st_size == 0:
+            return _DEFAULT_ENDPOINTS
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if orjson is not None:
+                # orjson accepts a memoryview over the mapped pages directly;
+                # release it before the map closes or mmap raises BufferError
+                view = memoryview(mm)
+                try:
+                    config = _loads(view)
+                finally:
+                    view.release()
+            else:
+                # the stdlib fallback codec needs a real bytes object
+                config = _loads(mm[:])
+
+    endpoints = tuple(
+        (entry, "GET") if isinstance(entry, str) else (entry[0], entry[1])
+        for entry in config.get('endpoints', ())
+    )
+    return endpoints or _DEFAULT_ENDPOINTS
+
+def main():
+    parser = argparse.ArgumentParser(description="Ollama Distributed API test client")
+    parser.add_argument('--config', help="JSON file with an 'endpoints' list; defaults to the built-in suite")
+    args = parser.parse_args()
+
+    endpoints = _load_endpoints(args.config) if args.config else _DEFAULT_ENDPOINTS
+
+    client = OllamaAPIClient()
+
+    print("🧪 Running API test suite...")
+
+    # NDJSON sink: one orjson line per result, written as each probe
+    # completes. tail -f works mid-run and memory stays flat on soak tests.
+    with open("api-test-results.ndjson", "wb") as f:
+        def _sink(result):
+            # Deferred timestamp formatting: one datetime per result here
+            # instead of one per probe on the hot path
+            result.timestamp = datetime.fromtimestamp(
+                result.timestamp_ns / 1e9, tz=timezone.utc
+            ).isoformat()
+            f.write(_dumps(result) + b'\n')
+
+        results = client.run_test_suite(endpoints=endpoints, sink=_sink)
+
+    for result in results:
+        marker = "✅" if result.success else "❌"
+        print(f"{marker} {result.method} {result.endpoint} -> {result.status_code} ({result.response_time}s)")
+
+    passed = sum(1 for r in results if r.success)
+    print(f"\n📊 {passed}/{len(results)} endpoints healthy")
+    print("📁 Results streamed to api-test-results.ndjson")
+
+if __name__ == '__main__':
+    main()